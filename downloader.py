@@ -1,39 +1,121 @@
-from pydrive.auth import GoogleAuth
-from pydrive.drive import GoogleDrive
+import asyncio
+import hashlib
+import json
+import logging
+import shutil
+import time
+import aiofiles
+import aiohttp
+import httplib2
+from googleapiclient.discovery import Resource, build
+from pydrive.auth import AuthError, GoogleAuth, InvalidCredentialsError
+from rate_limit import RateLimiter
+from retry import RETRIABLE_CODES, MAX_ATTEMPTS, backoff_delay
 import constants
 import os
 
+log = logging.getLogger(__name__)
+
+DRIVE_MEDIA_URL = "https://www.googleapis.com/drive/v3/files/{}?alt=media"
+CHUNK_SIZE = 65536
+MAX_CONCURRENT_DOWNLOADS = 3
+LIST_CACHE_DIR = ".drive_list_cache"
+# Seconds. Long-lived is fine: a missing name or a 404 on a cached id re-lists the
+# folder within the same run, so a stale listing never costs a send
+LIST_CACHE_TTL = 7 * 24 * 60 * 60
+PREFETCH_DIR = ".prefetch"
+LIST_PAGE_SIZE = 1000
+HTTP_TIMEOUT = 30  # seconds
+DOWNLOAD_TIMEOUT = 300  # seconds per attempt, the audio files can be large
+
+# Stay under Drive's per-user request quota, retries back off on top of this
+drive_rate_limiter = RateLimiter(8)
+
+# Credentials and Drive client shared across calls in the same process, see get_drive()
+_gauth = None
+_drive = None
+
 class AuthenticationError(Exception):
     pass
 
 
-def download_files(page_num: int):
+def download_files(page_num: int, drive: Resource = None, dest_dir: str = "."):
+    daily_files = {
+        f"{page_num}.jpg": constants.PAGES_FOLDER_ID,
+        f"{page_num}.mp3": constants.AUDIO_FOLDER_ID,
+        # f"{page_num}.jpeg": constants.TRANSLATIONS_FOLDER_ID,
+    }
+
+    # Files we still need from Drive, by local destination
+    pending = {}
+    for file_name, folder_id in daily_files.items():
+        dest = os.path.join(dest_dir, file_name)
+        prefetched = os.path.join(PREFETCH_DIR, file_name)
+        if dest_dir != PREFETCH_DIR and os.path.exists(prefetched):
+            # Already fetched at the end of the previous run
+            os.replace(prefetched, dest)
+            log.info("File %s taken from prefetch", dest)
+            continue
+        pending[dest] = (file_name, folder_id)
+
+    if not pending:
+        return
+
     try:
-        drive = authenticate()
-    except:
+        if drive is None:
+            drive = get_drive()
+        # Token for the downloads below, from the credentials of the client in use
+        access_token = get_access_token(drive)
+    except (AuthError, InvalidCredentialsError) as e:
         # TODO: Automate deleting?
-        raise AuthenticationError("Please re-auth, delete creds.json")
-    
-    pages_file_list = get_file_list(constants.PAGES_FOLDER_ID, drive)
-    audio_file_list = get_file_list(constants.AUDIO_FOLDER_ID, drive)
-    translations_file_list = get_file_list(constants.TRANSLATIONS_FOLDER_ID, drive)
+        raise AuthenticationError("Please re-auth, delete creds.json") from e
+
+    # List every folder we need in a single Drive query, lookups below hit the cache
+    get_file_lists(
+        [constants.PAGES_FOLDER_ID, constants.AUDIO_FOLDER_ID, constants.TRANSLATIONS_FOLDER_ID],
+        drive,
+    )
+
+    # Map local destination -> Drive file id, fetched concurrently below
+    downloads = {}
+    for dest, (file_name, folder_id) in pending.items():
+        file = find_file(file_name, folder_id, drive)
+        if file["md5"] is not None and file["md5"] == _md5(dest):
+            # Left over from an earlier run that didn't get to clean up
+            log.info("File %s is already up to date", dest)
+            continue
+        downloads[dest] = file["id"]
 
-    page_file = f"{page_num}.jpg"
-    audio_file = f"{page_num}.mp3"
-    translation_file = f"{page_num}.jpeg"
+    if downloads:
+        stale = asyncio.run(_download_all(access_token, downloads))
+        if stale:
+            # The cached listing had outdated ids, look the files up again and retry once
+            downloads = {dest: find_file(*pending[dest], drive)["id"] for dest in stale}
+            stale = asyncio.run(_download_all(access_token, downloads))
+        if stale:
+            raise FileNotFoundError(", ".join(pending[dest][0] for dest in stale))
+
+
+def prefetch_files(page_num: int):
+    os.makedirs(PREFETCH_DIR, exist_ok=True)
+    try:
+        download_files(page_num, dest_dir=PREFETCH_DIR)
+    except Exception as e:
+        # Not fatal, the next run downloads whatever is missing
+        log.warning("Prefetch for page %s failed: %s", page_num, e)
 
-    download_file(page_file, pages_file_list)
-    download_file(audio_file, audio_file_list)
-    # download_file(translation_file, translations_file_list)
 
 def delete_files(page_num: int):
     for ext in ["jpg", "mp3", "jpeg"]:
         filename = f"{page_num}.{ext}"
-        if os.path.exists(filename):
+        # Remove directly instead of checking existence first, one syscall per file
+        try:
             os.remove(filename)
-            print(f"{filename} deleted sucessfully")
+        except FileNotFoundError:
+            continue
+        log.info("%s deleted sucessfully", filename)
+
 
-    
 def authenticate():
     gauth = GoogleAuth()
 
@@ -51,21 +133,159 @@ def authenticate():
     # Save the current credentials to a file
     gauth.SaveCredentialsFile("creds.json")
 
-    return GoogleDrive(gauth)
+    return gauth
+
+
+def get_drive():
+    global _gauth, _drive
+    if _drive is None:
+        _gauth = authenticate()
+        # Plain Drive v3 REST client on PyDrive's credentials; the single authorized
+        # Http keeps its connection alive across calls
+        http = _gauth.credentials.authorize(httplib2.Http(timeout=HTTP_TIMEOUT))
+        _drive = build("drive", "v3", http=http, cache_discovery=False)
+    elif _gauth.access_token_expired:
+        # Only touch creds.json again when the token actually needs refreshing
+        _gauth.Refresh()
+        _gauth.SaveCredentialsFile("creds.json")
+    return _drive
+
+
+def get_access_token(drive: Resource = None):
+    if drive is None or drive is _drive:
+        # Refreshes the shared credentials first if they've expired
+        get_drive()
+        return _gauth.credentials.access_token
+    # A caller's own client, oauth2client keeps its credentials on the authorized request
+    return drive._http.request.credentials.access_token
+
+
+def _list_cache_path(folder_id: str):
+    return os.path.join(LIST_CACHE_DIR, f"{folder_id}.json")
+
+
+def get_file_list(folder_id: str, drive: Resource):
+    return get_file_lists([folder_id], drive)[folder_id]
+
+
+def get_file_lists(folder_ids: list, drive: Resource):
+    file_indexes = {}
+    for folder_id in folder_ids:
+        cache_path = _list_cache_path(folder_id)
+        if os.path.exists(cache_path) and time.time() - os.path.getmtime(cache_path) < LIST_CACHE_TTL:
+            with open(cache_path) as f:
+                file_indexes[folder_id] = json.load(f)
+
+    stale_ids = [folder_id for folder_id in folder_ids if folder_id not in file_indexes]
+    if not stale_ids:
+        return file_indexes
+
+    # One query covers every folder that isn't cached, bucketed by parent below
+    parents_query = " or ".join(f"'{folder_id}' in parents" for folder_id in stale_ids)
+    # Ask only for the fields we read, following nextPageToken past pageSize
+    file_list = []
+    request = drive.files().list(
+        q=f"({parents_query}) and trashed=false",
+        fields="nextPageToken, files(id, name, md5Checksum, parents)",
+        pageSize=LIST_PAGE_SIZE,
+    )
+    while request is not None:
+        drive_rate_limiter.wait()
+        # The client retries 429s, 5xx and connection errors itself with backoff
+        response = request.execute(num_retries=MAX_ATTEMPTS - 1)
+        file_list.extend(response.get("files", []))
+        request = drive.files().list_next(request, response)
+
+    # Only keep what the download step needs, indexed by name
+    fresh_indexes = {folder_id: {} for folder_id in stale_ids}
+    for file in file_list:
+        for parent_id in file.get("parents", []):
+            if parent_id in fresh_indexes:
+                fresh_indexes[parent_id][file["name"]] = {
+                    "id": file["id"],
+                    "md5": file.get("md5Checksum"),
+                }
+
+    os.makedirs(LIST_CACHE_DIR, exist_ok=True)
+    for folder_id, file_index in fresh_indexes.items():
+        with open(_list_cache_path(folder_id), "w") as f:
+            json.dump(file_index, f)
+    file_indexes.update(fresh_indexes)
+    return file_indexes
+
+
+def clear_file_list_cache(folder_id: str = None):
+    if folder_id is None:
+        shutil.rmtree(LIST_CACHE_DIR, ignore_errors=True)
+    elif os.path.exists(_list_cache_path(folder_id)):
+        os.remove(_list_cache_path(folder_id))
+
+
+def find_file(file_name: str, folder_id: str, drive: Resource):
+    file = get_file_list(folder_id, drive).get(file_name)
+    if file is None:
+        # The cached listing may predate the file, re-list once before giving up
+        clear_file_list_cache(folder_id)
+        file = get_file_list(folder_id, drive).get(file_name)
+    if file is None:
+        #TODO: Send msg alert that file is missing
+        raise FileNotFoundError(file_name)
+    return file
+
+
+def _md5(path: str):
+    try:
+        with open(path, "rb") as f:
+            digest = hashlib.md5()
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
 
 
-def get_file_list(folder_id: str, drive: GoogleDrive):
-    file_list = drive.ListFile(
-        {"q": f"'{folder_id}' in parents and trashed=false"}
-    ).GetList()
-    return file_list
+async def _download_all(access_token: str, downloads: dict):
+    """Download every file id to its destination, returns the destinations whose id 404'd."""
+    sem = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+    headers = {"Authorization": f"Bearer {access_token}"}
+    # A stalled stream fails after HTTP_TIMEOUT without data instead of hanging the run
+    timeout = aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT, sock_read=HTTP_TIMEOUT)
+    async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
+        found = await asyncio.gather(
+            *(_download(session, sem, file_id, dest) for dest, file_id in downloads.items())
+        )
+    return [dest for dest, ok in zip(downloads, found) if not ok]
 
 
-def download_file(file_name: str, file_list):
-    for file in file_list: # TODO: better approach here?
-        if file_name == file["title"]:
-            file.GetContentFile(file_name)
-            print(f"File {file_name} has been saved locally")
-            return
-    #TODO: Send msg alert that file is missing
-    
+async def _download(session: aiohttp.ClientSession, sem: asyncio.Semaphore, file_id: str, dest: str):
+    async with sem:
+        for attempt in range(MAX_ATTEMPTS):
+            await drive_rate_limiter.wait_async()
+            retry_after = None
+            try:
+                async with session.get(DRIVE_MEDIA_URL.format(file_id)) as resp:
+                    if resp.status not in RETRIABLE_CODES or attempt == MAX_ATTEMPTS - 1:
+                        if resp.status == 404:
+                            # Stale id from the cached listing, the caller re-lists and retries
+                            clear_file_list_cache()
+                            log.warning("File %s not found on Drive by its cached id", dest)
+                            return False
+                        resp.raise_for_status()
+                        # Stream to disk so large audio files never sit fully in memory,
+                        # into a .part file so an interrupted download never looks complete
+                        part_path = f"{dest}.part"
+                        async with aiofiles.open(part_path, "wb") as f:
+                            async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                                await f.write(chunk)
+                        os.replace(part_path, dest)
+                        break
+                    retry_after = resp.headers.get("Retry-After")
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                # Dropped connection or stalled stream, retried like a retriable status
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+                log.warning("Download of %s failed (%r), retrying", dest, e)
+            # Back off outside the response block so the connection is released
+            await asyncio.sleep(backoff_delay(attempt, retry_after=retry_after))
+    log.info("File %s has been saved locally", dest)
+    return True
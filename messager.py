@@ -1,21 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import mimetypes
+import os
+from requests.adapters import HTTPAdapter
 from whatsapp_api_client_python import API
+from rate_limit import RateLimiter
+from retry import retry_on_code
 import constants
 
 
+log = logging.getLogger(__name__)
+
 greenAPI = API.GreenApi(constants.ACCOUNT_ID, constants.TOKEN_INSTANCE)
 
+MAX_CONCURRENT_UPLOADS = 3
+# (connect, read) in seconds. raw_request sets no timeout of its own, and a stalled
+# upload would otherwise hang the run instead of coming back as a retriable failure
+UPLOAD_TIMEOUT = (10, 120)
+
+# The client sends "Connection: close" on every request; keep connections alive and
+# size the pool for the concurrent uploads. This adapter drops the client's own 429
+# retries, retry_on_code already covers those.
+greenAPI.session.headers.pop("Connection", None)
+greenAPI.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+# GreenAPI throttles bursts, retries back off on top of this
+greenapi_rate_limiter = RateLimiter(1)
+
 
 class SendingError(Exception):
     pass
 
 
 def send_daily_messages(counter: int):
-    send_media(f"{counter}.jpg")
-    print("Daily Page Sent")
-    # send_media(f"{counter}.png")
-    # print("Translation Sent")
-    send_media(f"{counter}.mp3")
-    print("Audio Sent")
+    daily_media = {
+        f"{counter}.jpg": "Daily Page Sent",
+        # f"{counter}.png": "Translation Sent",
+        f"{counter}.mp3": "Audio Sent",
+    }
+    # Uploads run concurrently, the sends stay sequential to keep the chat order
+    urls = upload_media(list(daily_media))
+    for filename, sent_message in daily_media.items():
+        send_media_url(filename, urls[filename])
+        log.info(sent_message)
 
 
 def send_friday_message():
@@ -30,8 +57,68 @@ def send_friday_message():
 #         print(response.error)
 
 
+@retry_on_code()
+def _upload_file(filename: str):
+    greenapi_rate_limiter.wait()
+    # Same request as sending.uploadFile, but the open file is streamed as the body
+    # instead of being read into memory first
+    with open(filename, "rb") as f:
+        return greenAPI.raw_request(
+            method="POST",
+            url=(
+                f"{greenAPI.media}/waInstance{greenAPI.idInstance}/"
+                f"uploadFile/{greenAPI.apiTokenInstance}"
+            ),
+            data=f,
+            timeout=UPLOAD_TIMEOUT,
+            headers={
+                "Content-Type": mimetypes.guess_type(filename)[0],
+                "GA-Filename": os.path.basename(filename),
+            },
+        )
+
+
+@retry_on_code()
+def _send_file_by_url(filename: str, url: str):
+    greenapi_rate_limiter.wait()
+    return greenAPI.sending.sendFileByUrl(constants.TEST_GROUP_ID, url, filename)
+
+
+@retry_on_code()
+def _send_message(text: str):
+    greenapi_rate_limiter.wait()
+    return greenAPI.sending.sendMessage(constants.TEST_GROUP_ID, text)
+
+
 def send_media(filename: str):
-    response = greenAPI.sending.sendFileByUpload(constants.TEST_GROUP_ID, filename)
+    # Same upload-then-send path as the daily messages
+    send_media_url(filename, upload_media([filename])[filename])
+
+
+def upload_media(filenames: list):
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_UPLOADS) as executor:
+        futures = {filename: executor.submit(_upload_file, filename) for filename in filenames}
+
+    urls = {}
+    errors = []
+    for filename, future in futures.items():
+        # An upload that raised is reported with the rest instead of hiding their results
+        try:
+            response = future.result()
+        except Exception as e:
+            errors.append(f"{filename} ({e!r})")
+            continue
+        if response.code != 200:
+            errors.append(f"{filename} (Error code: {response.code}. More info here: {response.error})")
+        else:
+            urls[filename] = response.data["urlFile"]
+    if errors:
+        raise SendingError(f"Failed to upload: {', '.join(errors)}")
+    return urls
+
+
+def send_media_url(filename: str, url: str):
+    response = _send_file_by_url(filename, url)
     if response.code != 200:
         raise SendingError(
             f"Failed to send. Error code: {response.code}. More info here: {response.error}"
@@ -39,6 +126,6 @@ def send_media(filename: str):
 
 
 def send_text_message(text: str):
-    msg_response = greenAPI.sending.sendMessage(constants.TEST_GROUP_ID, f"{text}")
+    msg_response = _send_message(f"{text}")
     if msg_response.code != 200:
-        print(msg_response.error)
+        log.error(msg_response.error)
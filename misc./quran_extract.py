@@ -3,133 +3,590 @@ import os
 import sys
 from pathlib import Path
 import fitz  # PyMuPDF
+import hashlib
+import numpy as np
 import re
 import requests
-from PIL import Image, ImageDraw, ImageFont
-import io
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from PIL import Image
+import random
+from bisect import bisect_right
+from collections import deque
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import lru_cache, partial
+from itertools import accumulate, islice
+import json
+import logging
 
-def get_page_verse_ranges(api_base_url, pages_to_fetch=10):
+log = logging.getLogger(__name__)
+
+# On-disk cache for API results, the page -> verse mapping never changes
+CACHE_DIR = Path.home() / ".cache" / "quran_extract"
+# zlib level for saved images, level 1 encodes several times faster than the default 6
+# for slightly larger files, the difference doesn't matter for images sent over WhatsApp
+PNG_COMPRESS_LEVEL = 1
+# Saved images are quantized to a palette of this many colors, 8 bits per pixel instead
+# of 24. The pages are mostly black and white but have colored headings and intros,
+# which a grayscale image would lose
+PNG_PALETTE_COLORS = 256
+# Separate connect and read timeouts for API requests, in seconds
+API_TIMEOUT = (3.05, 10)
+# Above this many pages, one whole-Quran request is cheaper than a request per page
+BULK_FETCH_THRESHOLD = 20
+# After this many consecutive failed API requests, stop calling it for CIRCUIT_OPEN_SECONDS
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_OPEN_SECONDS = 30
+
+# Patterns used in the per-page and per-line scanning loops, compiled once
+# Verse number followed by a period and a space
+_VERSE_NUM_RE = re.compile(r'(\d+)\.\s')
+# Looser fallback: any number followed by a period, not part of a decimal
+_VERSE_NUM_ALT_RE = re.compile(r'(?<!\d)(\d+)\.(?!\d)')
+# Arabic surah name in parentheses, common in surah headers
+_ARABIC_NAME_RE = re.compile(r"\(\s*[A-Za-z\-']+\s*\)")
+# Intro text describing the surah
+_SURAH_INTRO_RES = [
+    re.compile(pattern) for pattern in [
+        r"This .+s[ûu]rah",
+        "Medinian sûrah",
+        "Meccan sûrah",
+        "This sûrah",
+        "verses were revealed"
+    ]
+]
+
+def _backoff_delay(attempt, retry_after=None, base=0.5, cap=8.0):
+    """
+    Compute how long to wait before a retry.
+    
+    Args:
+        attempt: Retry attempt number, starting at 1
+        retry_after: Value of the Retry-After header, if the server sent one
+        base: Delay for the first attempt in seconds (default: 0.5)
+        cap: Maximum delay in seconds (default: 8.0)
+        
+    Returns:
+        The delay in seconds: the server's Retry-After when given, otherwise
+        exponential backoff with full jitter
+    """
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), cap)
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+class CircuitOpen(Exception):
+    """Raised instead of calling the API while it is considered down."""
+
+# Circuit breaker state shared by all fetch workers
+_circuit = {"fails": 0, "open_until": 0.0}
+_circuit_lock = threading.Lock()
+
+def _api_get(session, url):
+    """
+    GET an API URL through the circuit breaker, so an API that is down fails fast
+    instead of every page waiting out its timeouts and retries.
+    
+    Args:
+        session: requests.Session to make the request with
+        url: URL to request
+        
+    Returns:
+        The response, request errors are re-raised after being counted
+    """
+    with _circuit_lock:
+        if time.monotonic() < _circuit["open_until"]:
+            raise CircuitOpen(f"API unavailable, not retrying for up to {CIRCUIT_OPEN_SECONDS}s")
+    
+    try:
+        response = session.get(url, timeout=API_TIMEOUT)
+    except requests.exceptions.RequestException:
+        _record_api_result(ok=False)
+        raise
+    # Rate limiting counts as a failure too, so a throttled API trips the circuit
+    _record_api_result(ok=response.status_code != 429 and response.status_code < 500)
+    return response
+
+def _record_api_result(ok):
+    """Reset the failure count on success, open the circuit after too many failures in a row."""
+    with _circuit_lock:
+        if ok:
+            _circuit["fails"] = 0
+            return
+        _circuit["fails"] += 1
+        if _circuit["fails"] >= CIRCUIT_FAILURE_THRESHOLD:
+            log.warning("API failed %s times in a row, pausing requests for %ss", _circuit['fails'], CIRCUIT_OPEN_SECONDS)
+            _circuit["open_until"] = time.monotonic() + CIRCUIT_OPEN_SECONDS
+
+def _fetch_page(session, api_base_url, page_num, retries=2):
+    """
+    Fetch the verse range for a single page from the API, retrying on failure.
+    
+    Args:
+        session: requests.Session shared between the fetch workers
+        api_base_url: The base URL for the Quran API
+        page_num: Page number to fetch
+        retries: Number of retries for failed requests (default: 2)
+        
+    Returns:
+        A (page_num, verse_range) tuple, verse_range is None if the page could not be fetched
+    """
+    retry_count = 0
+    
+    while retry_count <= retries:
+        try:
+            # Make API request to get page data with timeout
+            url = f"{api_base_url}/page/{page_num}/quran-uthmani"
+            log.debug("Requesting %s...", url)
+            
+            response = _api_get(session, url)
+            
+            if response.status_code != 200:
+                log.warning("API error on page %s: %s", page_num, response.status_code)
+                # Only rate limiting and server errors are worth retrying
+                if response.status_code != 429 and response.status_code < 500:
+                    break
+                retry_count += 1
+                if retry_count <= retries:
+                    log.debug("Retrying... (attempt %s/%s)", retry_count, retries)
+                    time.sleep(_backoff_delay(retry_count, response.headers.get("Retry-After")))
+                    continue
+                else:
+                    break
+                
+            # Parse the response
+            data = response.json()
+            
+            if 'data' not in data:
+                log.warning("Invalid response structure for page %s: 'data' field missing", page_num)
+                retry_count += 1
+                if retry_count <= retries:
+                    log.debug("Retrying... (attempt %s/%s)", retry_count, retries)
+                    time.sleep(_backoff_delay(retry_count))
+                    continue
+                else:
+                    break
+            
+            if 'ayahs' not in data['data'] or not data['data']['ayahs']:
+                log.warning("Invalid or empty response structure for page %s: 'ayahs' field missing or empty", page_num)
+                retry_count += 1
+                if retry_count <= retries:
+                    log.debug("Retrying... (attempt %s/%s)", retry_count, retries)
+                    time.sleep(_backoff_delay(retry_count))
+                    continue
+                else:
+                    break
+            
+            ayahs = data['data']['ayahs']
+            
+            # Get first and last ayah (verse) on the page
+            first_ayah = ayahs[0]
+            last_ayah = ayahs[-1]
+            
+            log.debug("API Page %s: Surah %s:%s to Surah %s:%s (Total verses: %s)",
+                      page_num, first_ayah['surah']['number'], first_ayah['numberInSurah'],
+                      last_ayah['surah']['number'], last_ayah['numberInSurah'], len(ayahs))
+            
+            # Return the verse range for this page
+            return page_num, {
+                'start_chapter': first_ayah['surah']['number'],
+                'start_verse': first_ayah['numberInSurah'],
+                'end_chapter': last_ayah['surah']['number'],
+                'end_verse': last_ayah['numberInSurah'],
+                'all_verses': [a['numberInSurah'] for a in ayahs] # Store all verse numbers on this page
+            }
+        
+        except CircuitOpen as e:
+            log.warning("Skipping page %s: %s", page_num, e)
+            break
+        except requests.exceptions.Timeout:
+            log.warning("API request timeout for page %s", page_num)
+            retry_count += 1
+            if retry_count <= retries:
+                log.debug("Retrying... (attempt %s/%s)", retry_count, retries)
+                time.sleep(_backoff_delay(retry_count))
+            else:
+                log.warning("Max retries reached for page %s, skipping", page_num)
+        except requests.exceptions.RequestException as e:
+            log.warning("API request error for page %s: %s", page_num, e)
+            retry_count += 1
+            if retry_count <= retries:
+                log.debug("Retrying... (attempt %s/%s)", retry_count, retries)
+                time.sleep(_backoff_delay(retry_count))
+            else:
+                log.warning("Max retries reached for page %s, skipping", page_num)
+        except (KeyError, ValueError, TypeError) as e:
+            log.error("Error parsing API response for page %s: %s", page_num, e)
+            retry_count += 1
+            if retry_count <= retries:
+                log.debug("Retrying... (attempt %s/%s)", retry_count, retries)
+                time.sleep(_backoff_delay(retry_count))
+            else:
+                log.warning("Max retries reached for page %s, skipping", page_num)
+    
+    return page_num, None
+
+def _fetch_all_pages(session, api_base_url, pages_to_fetch, retries=2):
+    """
+    Fetch the verse ranges for the first pages_to_fetch pages in a single request for the whole Quran.
+    
+    Args:
+        session: requests.Session to make the request with
+        api_base_url: The base URL for the Quran API
+        pages_to_fetch: Number of pages to return verse ranges for
+        retries: Number of retries for failed requests (default: 2)
+        
+    Returns:
+        A dictionary mapping page numbers to verse ranges, or None if the request failed
+    """
+    url = f"{api_base_url}/quran/quran-uthmani"
+    
+    for attempt in range(retries + 1):
+        if attempt:
+            log.debug("Retrying... (attempt %s/%s)", attempt, retries)
+            time.sleep(_backoff_delay(attempt))
+        try:
+            log.debug("Requesting %s...", url)
+            response = _api_get(session, url)
+            if response.status_code != 200:
+                log.warning("API error on bulk request: %s", response.status_code)
+                # Only rate limiting and server errors are worth retrying
+                if response.status_code != 429 and response.status_code < 500:
+                    return None
+                continue
+            surahs = response.json()['data']['surahs']
+        except CircuitOpen as e:
+            log.warning("Skipping bulk request: %s", e)
+            return None
+        except requests.exceptions.RequestException as e:
+            log.warning("API request error on bulk request: %s", e)
+            continue
+        except (KeyError, ValueError, TypeError) as e:
+            log.error("Error parsing bulk API response: %s", e)
+            continue
+        
+        # Group the (surah, verse) pairs by the page each ayah is on, ayahs come in order
+        page_ayahs = {}
+        for surah in surahs:
+            for ayah in surah['ayahs']:
+                if ayah['page'] <= pages_to_fetch:
+                    page_ayahs.setdefault(ayah['page'], []).append((surah['number'], ayah['numberInSurah']))
+        
+        return {
+            page_num: {
+                'start_chapter': ayahs[0][0],
+                'start_verse': ayahs[0][1],
+                'end_chapter': ayahs[-1][0],
+                'end_verse': ayahs[-1][1],
+                'all_verses': [verse for _, verse in ayahs]
+            }
+            for page_num, ayahs in page_ayahs.items()
+        }
+    
+    log.warning("Max retries reached for bulk request")
+    return None
+
+def get_page_verse_ranges(api_base_url, pages_to_fetch=10, max_workers=16):
     """
     Call the alquran.cloud API to get the starting and ending verses for each page.
     
+    Pages are fetched concurrently over a shared session since the work is network-bound,
+    or with a single request for the whole Quran when more than BULK_FETCH_THRESHOLD are needed.
+    Complete results are cached on disk, so later runs don't hit the API at all.
+    
     Args:
         api_base_url: The base URL for the Quran API
         pages_to_fetch: Number of pages to fetch (default: 10)
+        max_workers: Number of concurrent requests (default: 16)
         
     Returns:
         A dictionary mapping page numbers to verse ranges (start_chapter, start_verse, end_chapter, end_verse)
     """
-    print(f"Fetching page verse ranges from API...")
+    cache_path = CACHE_DIR / f"pages_{pages_to_fetch}.json"
+    if cache_path.exists() and cache_path.stat().st_size > 0:
+        try:
+            with open(cache_path) as f:
+                # JSON object keys are strings, page numbers are ints
+                page_verses = {int(page_num): verse_range for page_num, verse_range in json.load(f).items()}
+            log.info("Loaded verse ranges for %s pages from cache: %s", len(page_verses), cache_path)
+            return page_verses
+        except (OSError, ValueError) as e:
+            log.warning("Ignoring unreadable cache %s: %s", cache_path, e)
+    
+    log.info("Fetching page verse ranges from API...")
     
     try:
         page_verses = {}
-        retries = 2  # Number of retries for failed requests
+        # Keep-alive pool with a connection per worker; _fetch_page does its own retries
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=max_workers, max_retries=Retry(total=0))
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
         
-        # Fetch data for each page
-        for page_num in range(1, pages_to_fetch + 1):
-            success = False
-            retry_count = 0
+        if pages_to_fetch > BULK_FETCH_THRESHOLD:
+            page_verses = _fetch_all_pages(session, api_base_url, pages_to_fetch) or {}
+            if not page_verses:
+                log.warning("Bulk request failed, falling back to fetching page by page")
+        
+        if not page_verses:
+            fetch_page = partial(_fetch_page, session, api_base_url)
             
-            while not success and retry_count <= retries:
-                try:
-                    # Make API request to get page data with timeout
-                    url = f"{api_base_url}/page/{page_num}/quran-uthmani"
-                    print(f"Requesting {url}...")
-                    
-                    response = requests.get(url, timeout=10)
-                    
-                    if response.status_code != 200:
-                        print(f"API error on page {page_num}: {response.status_code}")
-                        retry_count += 1
-                        if retry_count <= retries:
-                            print(f"Retrying... (attempt {retry_count}/{retries})")
-                            continue
-                        else:
-                            break
-                        
-                    # Parse the response
-                    data = response.json()
-                    
-                    if 'data' not in data:
-                        print(f"Invalid response structure for page {page_num}: 'data' field missing")
-                        retry_count += 1
-                        if retry_count <= retries:
-                            print(f"Retrying... (attempt {retry_count}/{retries})")
-                            continue
-                        else:
-                            break
-                    
-                    if 'ayahs' not in data['data'] or not data['data']['ayahs']:
-                        print(f"Invalid or empty response structure for page {page_num}: 'ayahs' field missing or empty")
-                        retry_count += 1
-                        if retry_count <= retries:
-                            print(f"Retrying... (attempt {retry_count}/{retries})")
-                            continue
-                        else:
-                            break
-                    
-                    ayahs = data['data']['ayahs']
-                    
-                    # Get first and last ayah (verse) on the page
-                    first_ayah = ayahs[0]
-                    last_ayah = ayahs[-1]
-                    
-                    # Store the verse range for this page
-                    page_verses[page_num] = {
-                        'start_chapter': first_ayah['surah']['number'],
-                        'start_verse': first_ayah['numberInSurah'],
-                        'end_chapter': last_ayah['surah']['number'],
-                        'end_verse': last_ayah['numberInSurah'],
-                        'all_verses': [a['numberInSurah'] for a in ayahs] # Store all verse numbers on this page
-                    }
-                    
-                    print(f"API Page {page_num}: Surah {first_ayah['surah']['number']}:{first_ayah['numberInSurah']} to "
-                          f"Surah {last_ayah['surah']['number']}:{last_ayah['numberInSurah']} "
-                          f"(Total verses: {len(ayahs)})")
-                    
-                    success = True
-                
-                except requests.exceptions.Timeout:
-                    print(f"API request timeout for page {page_num}")
-                    retry_count += 1
-                    if retry_count <= retries:
-                        print(f"Retrying... (attempt {retry_count}/{retries})")
-                    else:
-                        print(f"Max retries reached for page {page_num}, skipping")
-                except requests.exceptions.RequestException as e:
-                    print(f"API request error for page {page_num}: {e}")
-                    retry_count += 1
-                    if retry_count <= retries:
-                        print(f"Retrying... (attempt {retry_count}/{retries})")
-                    else:
-                        print(f"Max retries reached for page {page_num}, skipping")
-                except (KeyError, ValueError, TypeError) as e:
-                    print(f"Error parsing API response for page {page_num}: {e}")
-                    retry_count += 1
-                    if retry_count <= retries:
-                        print(f"Retrying... (attempt {retry_count}/{retries})")
-                    else:
-                        print(f"Max retries reached for page {page_num}, skipping")
+            # Fetch data for each page
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for page_num, verse_range in executor.map(fetch_page, range(1, pages_to_fetch + 1)):
+                    if verse_range is not None:
+                        page_verses[page_num] = verse_range
         
-        print(f"Successfully fetched verse ranges for {len(page_verses)} pages")
+        log.info("Successfully fetched verse ranges for %s pages", len(page_verses))
         
         if not page_verses:
-            print("Warning: No page verse ranges were fetched from the API")
-            print("You might want to try again later or check your internet connection")
+            log.warning("No page verse ranges were fetched from the API")
+            log.warning("You might want to try again later or check your internet connection")
             return None
+        
+        # Only cache complete results so a partial failure isn't remembered
+        if len(page_verses) == pages_to_fetch:
+            try:
+                CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                tmp_path = cache_path.with_suffix(".tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(page_verses, f)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                log.warning("Could not write cache %s: %s", cache_path, e)
             
         return page_verses
         
     except Exception as e:
-        print(f"Error fetching page data from API: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error fetching page data from API: %s", e)
         return None
 
+def _pdf_cache_key(pdf_path):
+    """Identify a PDF by its size and the hash of its first megabyte, without reading it all."""
+    with open(pdf_path, "rb") as f:
+        digest = hashlib.md5(f.read(1 << 20)).hexdigest()
+    return f"{os.path.getsize(pdf_path)}-{digest}"
+
+def load_surah_pages(pdf_path):
+    """
+    Load the chapter start pages detected in this PDF on an earlier run.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        
+    Returns:
+        A dictionary mapping chapter numbers to start pages, empty if nothing is cached
+    """
+    cache_path = CACHE_DIR / "surah_pages.json"
+    try:
+        with open(cache_path) as f:
+            cached = json.load(f).get(_pdf_cache_key(pdf_path), {})
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        log.warning("Ignoring unreadable cache %s: %s", cache_path, e)
+        return {}
+    # JSON object keys are strings, chapter numbers are ints
+    return {int(chapter): page for chapter, page in cached.items()}
+
+def save_surah_pages(pdf_path, surah_pages):
+    """
+    Cache the chapter start pages detected in a PDF for later runs.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        surah_pages: Dictionary mapping chapter numbers to start pages
+    """
+    cache_path = CACHE_DIR / "surah_pages.json"
+    try:
+        with open(cache_path) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = {}
+    cached[_pdf_cache_key(pdf_path)] = surah_pages
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(cached, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        log.warning("Could not write cache %s: %s", cache_path, e)
+
+@lru_cache(maxsize=4)
+def _open_doc(pdf_path):
+    """Open a PDF once per process and reuse the handle, it stays open until exit."""
+    return fitz.open(pdf_path)
+
+@lru_cache(maxsize=1024)
+def _page_text(pdf_path, page_num):
+    """
+    Extract a page's plain text once and reuse it across chapter and verse searches.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_num: Page number to extract
+        
+    Returns:
+        A (text, page_width, page_height) tuple
+    """
+    page = _open_doc(pdf_path)[page_num]
+    return page.get_text(), page.rect.width, page.rect.height
+
+@lru_cache(maxsize=256)
+def _page_blocks(pdf_path, page_num):
+    """
+    Extract a page's "dict" text blocks, only for pages the plain text marked as candidates.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_num: Page number to extract
+        
+    Returns:
+        The list of text blocks with their lines, spans and positions
+    """
+    return _open_doc(pdf_path)[page_num].get_text("dict")["blocks"]
+
+def _scan_line_verses(line):
+    """
+    Find the verse numbers in a text line and score how likely each one is a real verse number.
+    
+    This is the innermost loop of the verse search, so it works on plain locals only.
+    
+    Args:
+        line: A line from the page's "dict" text blocks
+        
+    Returns:
+        A (verse_numbers, scored_verses) tuple: every number matched in the line, and
+        (verse_num, confidence) pairs for those with reasonable confidence
+    """
+    spans = line["spans"]
+    line_text = "".join([span["text"] for span in spans])
+    
+    # Standard format first - number followed by period and space,
+    # then the looser pattern to catch verse numbers with different formatting
+    verse_matches = (list(_VERSE_NUM_RE.finditer(line_text))
+                     or list(_VERSE_NUM_ALT_RE.finditer(line_text)))
+    verse_numbers = [int(match.group(1)) for match in verse_matches]
+    if not verse_matches:
+        return verse_numbers, []
+    
+    # End offset of each span in line_text, to find the span a match starts in by bisection
+    span_ends = list(accumulate(len(span["text"]) for span in spans))
+    
+    scored_verses = []
+    for match, verse_num in zip(verse_matches, verse_numbers):
+        # Skip unreasonable verse numbers
+        if verse_num < 1 or verse_num > 300:
+            continue
+        
+        # Real verses usually have text following the number
+        match_end = match.end()
+        if not line_text[match_end:match_end+30].strip():
+            continue
+        
+        # Find which span contains this verse number
+        match_pos = match.start()
+        span_index = bisect_right(span_ends, match_pos)
+        if span_index == len(spans):
+            continue
+        span = spans[span_index]
+        
+        # Calculate confidence based on multiple factors
+        confidence = 0
+        # Bold numbers are more likely to be verse numbers
+        if span["flags"] & 16:
+            confidence += 3
+        # Larger font size indicates verse numbers
+        if span["size"] > 10:
+            confidence += 1
+        # Distinctive verse format - number at beginning of line
+        if match_pos < 5:
+            confidence += 2
+        # Verse numbers are usually 1-3 digits
+        if 1 <= len(match.group(1)) <= 3:
+            confidence += 1
+        
+        # Only keep verses with reasonable confidence
+        if confidence >= 2:
+            scored_verses.append((verse_num, confidence))
+    
+    return verse_numbers, scored_verses
+
+def _render_page(pdf_path, page_num, zoom):
+    """
+    Render a page at high resolution.
+    
+    Uses this process's cached handle, render pool workers drop the parent's in _init_worker.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_num: Page number to render
+        zoom: Scale factor for the rendering
+        
+    Returns:
+        A (samples, width, height) tuple with the page's raw RGB pixels
+    """
+    pix = _open_doc(pdf_path)[page_num].get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+    return pix.samples, pix.width, pix.height
+
+def _render_pages(pdf_path, page_nums, zoom, workers):
+    """
+    Render pages in order, in worker processes when there's more than one worker.
+    
+    Only as many pages as there are workers are rendered ahead of the one being consumed,
+    so memory holds that many full pages plus the current one rather than all of them.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_nums: Page numbers to render
+        zoom: Scale factor for the rendering
+        workers: Number of processes to render with
+        
+    Yields:
+        A (samples, width, height) tuple per page, see _render_page
+    """
+    if workers <= 1:
+        for page_num in page_nums:
+            yield _render_page(pdf_path, page_num, zoom)
+        return
+    
+    pages = iter(page_nums)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        pending = deque(executor.submit(_render_page, pdf_path, page_num, zoom)
+                        for page_num in islice(pages, workers))
+        while pending:
+            render = pending.popleft().result()
+            # Keep the workers busy with the next page while this one is cropped
+            for page_num in islice(pages, 1):
+                pending.append(executor.submit(_render_page, pdf_path, page_num, zoom))
+            yield render
+
+def _save_png(pixels, path):
+    """
+    Save an RGB pixel array as a palette PNG.
+    
+    Args:
+        pixels: (height, width, 3) uint8 array
+        path: Where to write the image
+    """
+    # Fast octree is quicker than the default median cut and still keeps the text sharp
+    img = Image.fromarray(pixels).quantize(PNG_PALETTE_COLORS, method=Image.Quantize.FASTOCTREE)
+    img.save(path, compress_level=PNG_COMPRESS_LEVEL)
+
+# Memoized find_chapter_start_page results, keyed by its arguments
+_CHAPTER_START_CACHE = {}
+
 def find_chapter_start_page(pdf_path, chapter_num, start_page=28, found_pages=None):
     """
     Find the page where a specific chapter starts.
     
+    Results are memoized for the life of the process.
+    
     Args:
         pdf_path: Path to the PDF file
         chapter_num: Chapter number to find
@@ -139,24 +596,73 @@ def find_chapter_start_page(pdf_path, chapter_num, start_page=28, found_pages=No
     Returns:
         The page number where the chapter starts, or None if not found
     """
+    cache_key = (pdf_path, chapter_num, start_page, tuple(found_pages or ()))
+    if cache_key in _CHAPTER_START_CACHE:
+        log.debug("Using cached result for Chapter %s: %s", chapter_num, _CHAPTER_START_CACHE[cache_key])
+        return _CHAPTER_START_CACHE[cache_key]
+    
+    page_num = _search_chapter_start_page(pdf_path, chapter_num, start_page, found_pages)
+    _CHAPTER_START_CACHE[cache_key] = page_num
+    return page_num
+
+def _has_centered_title(pdf_path, page_num, title, page_width):
+    """
+    Check whether a chapter title appears on a page as a centered line in a large font.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_num: Page number to check
+        title: Title text matched on the page
+        page_width: Width of the page
+        
+    Returns:
+        True if the title is laid out like a surah header, False otherwise
+    """
+    # search_for locates the title without parsing the page structure, the
+    # blocks are only needed for the font size once a centered hit is found
+    title_rects = _open_doc(pdf_path)[page_num].search_for(title)
+    if not any(abs((rect.x0 + rect.x1) / 2 - page_width/2) < page_width/4 for rect in title_rects):
+        return False
+    
+    for block in _page_blocks(pdf_path, page_num):
+        if "lines" not in block:
+            continue
+        
+        for line in block["lines"]:
+            line_text = "".join([span["text"] for span in line["spans"]])
+            
+            # Check if this line contains our chapter title
+            if title in line_text:
+                # Check position - titles are usually centered
+                line_x_center = (line["bbox"][0] + line["bbox"][2]) / 2
+                
+                # Check font size - titles are usually larger
+                font_size = max([span["size"] for span in line["spans"]], default=0)
+                
+                # If line is centered and has large font, it's likely a title
+                if (abs(line_x_center - page_width/2) < page_width/4 and font_size > 14):
+                    return True
+    return False
+
+def _search_chapter_start_page(pdf_path, chapter_num, start_page, found_pages):
+    """Scan the PDF for a chapter's start page, see find_chapter_start_page."""
     try:
         # Initialize found_pages if not provided
         if found_pages is None:
             found_pages = []
             
-        doc = fitz.open(pdf_path)
-        total_pages = len(doc)
+        total_pages = len(_open_doc(pdf_path))
         
-        print(f"Searching for Chapter {chapter_num} starting from page {start_page}")
-        print(f"Avoiding already found pages: {found_pages}")
+        log.debug("Searching for Chapter %s starting from page %s", chapter_num, start_page)
+        log.debug("Avoiding already found pages: %s", found_pages)
         
         # Very specific patterns to match exact surah title formatting
         # For strict title match including word boundaries and trailing context
         # This reduces the chance of matching partial titles or references
         exact_title_patterns = [
-            f"\\b{chapter_num}\\. The\\b",
-            f"\\b{chapter_num}\\. Al-\\w+\\b",
-            f"\\b{chapter_num}\\. [A-Z][a-z]+\\b"
+            re.compile(f"\\b{chapter_num}\\. The\\b"),
+            re.compile(f"\\b{chapter_num}\\. Al-\\w+\\b"),
+            re.compile(f"\\b{chapter_num}\\. [A-Z][a-z]+\\b")
         ]
         
         # Specific title check for this chapter - different chapters have different naming patterns
@@ -176,14 +682,11 @@ def find_chapter_start_page(pdf_path, chapter_num, start_page=28, found_pages=No
         for page_num in range(start_page, min(start_page + 200, total_pages)):
             # Skip pages that we've already identified as containing other surahs
             if page_num in found_pages:
-                print(f"Skipping page {page_num} as it's already assigned to another surah")
+                log.debug("Skipping page %s as it's already assigned to another surah", page_num)
                 continue
                 
-            page = doc[page_num]
-            text = page.get_text()
-            
-            # Get blocks for detailed analysis
-            blocks = page.get_text("dict")["blocks"]
+            # Plain text is enough to rule most pages out, blocks are only parsed for matches
+            text, page_width, _ = _page_text(pdf_path, page_num)
             
             # Track if we have a strong match
             strong_match = False
@@ -199,7 +702,7 @@ def find_chapter_start_page(pdf_path, chapter_num, start_page=28, found_pages=No
             # If no specific pattern matched, try the generic patterns
             if not strong_match:
                 for pattern in exact_title_patterns:
-                    match = re.search(pattern, text)
+                    match = pattern.search(text)
                     if match:
                         match_text = match.group(0)
                         # Verify this is a title, not just a reference
@@ -217,87 +720,61 @@ def find_chapter_start_page(pdf_path, chapter_num, start_page=28, found_pages=No
                 continue
                 
             # Additional verification: Look for distinctive formatting markers of a surah page
+            # The text checks are cheap, the centered title check needs the page layout
             
             # 1. Check for Arabic name in parentheses - common in surah headers
-            arabic_name_pattern = r"\(\s*[A-Za-z\-']+\s*\)"
-            has_arabic_name = bool(re.search(arabic_name_pattern, text))
+            has_arabic_name = bool(_ARABIC_NAME_RE.search(text))
             
             # 2. Check for bismillah - appears at start of most surahs
             has_bismillah = "In the Name of Allah" in text
             
             # 3. Check for intro text - usually red/italic text describing the surah
-            surah_intro_patterns = [
-                r"This .+s[ûu]rah",
-                "Medinian sûrah",
-                "Meccan sûrah",
-                "This sûrah",
-                "verses were revealed"
-            ]
-            has_intro = any(re.search(pattern, text) for pattern in surah_intro_patterns)
+            has_intro = any(pattern.search(text) for pattern in _SURAH_INTRO_RES)
             
-            # 4. Look for centered title formatting
-            is_centered_title = False
-            for block in blocks:
-                if "lines" not in block:
-                    continue
-                
-                for line in block["lines"]:
-                    line_text = "".join([span["text"] for span in line["spans"]])
-                    
-                    # Check if this line contains our chapter title
-                    if match_text in line_text:
-                        # Check position - titles are usually centered
-                        line_x_center = (line["bbox"][0] + line["bbox"][2]) / 2
-                        page_width = page.rect.width
-                        
-                        # Check font size - titles are usually larger
-                        font_size = max([span["size"] for span in line["spans"]], default=0)
-                        
-                        # If line is centered and has large font, it's likely a title
-                        if (abs(line_x_center - page_width/2) < page_width/4 and font_size > 14):
-                            is_centered_title = True
-                            break
+            text_indicator_count = sum([has_arabic_name, has_bismillah, has_intro])
+            
+            # With none of them, even a centered title can't reach 2 indicators
+            if text_indicator_count == 0:
+                continue
+            
+            # 4. Look for centered title formatting, only needed when it can change the outcome:
+            # with all three text indicators the page already passes (None means not checked)
+            is_centered_title = None
+            if text_indicator_count < 3:
+                is_centered_title = _has_centered_title(pdf_path, page_num, match_text, page_width)
             
             # Count how many surah indicators we have 
-            indicator_count = sum([
-                is_centered_title,
-                has_arabic_name, 
-                has_bismillah,
-                has_intro
-            ])
+            indicator_count = text_indicator_count + bool(is_centered_title)
             
             # Very strict check: require at least 3 indicators for a strong match
             if indicator_count >= 3:
-                print(f"Found chapter {chapter_num} on page {page_num} with strong surah formatting")
-                print(f"  Title: {match_text}")
-                print(f"  Has Arabic name: {has_arabic_name}")
-                print(f"  Has bismillah: {has_bismillah}")
-                print(f"  Has introduction: {has_intro}")
-                print(f"  Is centered title: {is_centered_title}")
-                print(f"  Total indicators: {indicator_count}")
-                doc.close()
+                log.debug("Found chapter %s on page %s with strong surah formatting", chapter_num, page_num)
+                log.debug("  Title: %s", match_text)
+                log.debug("  Has Arabic name: %s", has_arabic_name)
+                log.debug("  Has bismillah: %s", has_bismillah)
+                log.debug("  Has introduction: %s", has_intro)
+                log.debug("  Is centered title: %s", 'not checked' if is_centered_title is None else is_centered_title)
+                log.debug("  Total indicators: %s", indicator_count)
                 return page_num
             
             # Less strict but still reasonable: 2 indicators including the centered title
             if indicator_count >= 2 and is_centered_title:
-                print(f"Found chapter {chapter_num} on page {page_num} with partial surah formatting")
-                print(f"  Title: {match_text}")
-                print(f"  Indicator count: {indicator_count}")
-                doc.close()
+                log.debug("Found chapter %s on page %s with partial surah formatting", chapter_num, page_num)
+                log.debug("  Title: %s", match_text)
+                log.debug("  Indicator count: %s", indicator_count)
                 return page_num
                 
         # If we get here, we couldn't find the chapter
-        print(f"Could not find start page for Chapter {chapter_num}")
-        doc.close()
+        log.info("Could not find start page for Chapter %s", chapter_num)
         return None
         
     except Exception as e:
-        print(f"Error finding chapter start page: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error finding chapter start page: %s", e)
         return None
 
-def extract_verses_with_counter(pdf_path, chapter, verse_start, verse_end=None, output_dir=None, chapter_start_page=None):
+def extract_verses_with_counter(pdf_path, chapter, verse_start, verse_end=None, output_dir=None, chapter_start_page=None,
+                                next_chapter_start_page=None, max_render_workers=None, zoom=2.0,
+                                keep_intermediate=False):
     """
     Extract pages containing specified verses with improved multi-page handling.
     
@@ -308,6 +785,10 @@ def extract_verses_with_counter(pdf_path, chapter, verse_start, verse_end=None,
         verse_end: Ending verse number (default: same as verse_start)
         output_dir: Directory to save output images
         chapter_start_page: Page where the chapter starts (optional)
+        next_chapter_start_page: Page where the next chapter starts, skips searching for it (optional)
+        max_render_workers: Processes to render pages with (default: one per CPU)
+        zoom: Scale factor to render pages at, render time grows with its square (default: 2.0)
+        keep_intermediate: Also save each page's cropped image when they get merged (default: False)
         
     Returns:
         True if successful, False otherwise
@@ -315,7 +796,7 @@ def extract_verses_with_counter(pdf_path, chapter, verse_start, verse_end=None,
     if verse_end is None:
         verse_end = verse_start
         
-    print(f"Extracting Surah {chapter}, verses {verse_start}-{verse_end}...")
+    log.info("Extracting Surah %s, verses %s-%s...", chapter, verse_start, verse_end)
     
     try:
         # Set up output directory
@@ -328,34 +809,36 @@ def extract_verses_with_counter(pdf_path, chapter, verse_start, verse_end=None,
         if chapter_start_page is None:
             chapter_start_page = find_chapter_start_page(pdf_path, chapter)
             if not chapter_start_page:
-                print(f"Could not find start page for Chapter {chapter}")
+                log.info("Could not find start page for Chapter %s", chapter)
                 return False
         
-        # Open the PDF
-        doc = fitz.open(pdf_path)
-        total_pages = len(doc)
-        print("PDF opened successfully")
+        # Open the PDF, or reuse the handle the chapter search opened
+        total_pages = len(_open_doc(pdf_path))
+        log.debug("PDF opened successfully")
         
         # Find the next chapter's start page to set boundary
         next_chapter = chapter + 1
-        next_chapter_start = find_chapter_start_page(pdf_path, next_chapter, chapter_start_page + 1)
+        next_chapter_start = next_chapter_start_page
+        # Detected chapter pages can be out of order, only trust a hint that comes after this chapter
+        if next_chapter_start is None or next_chapter_start <= chapter_start_page:
+            next_chapter_start = find_chapter_start_page(pdf_path, next_chapter, chapter_start_page + 1)
         
         # Set search limit - either next chapter or a reasonable number of pages
         if next_chapter_start:
             search_limit = next_chapter_start
-            print(f"Found next chapter (Surah {next_chapter}) starting at page {next_chapter_start}")
+            log.debug("Found next chapter (Surah %s) starting at page %s", next_chapter, next_chapter_start)
         else:
             # If we can't find the next chapter, limit based on current chapter
             search_limit = min(chapter_start_page + 50, total_pages)
-            print(f"Could not find next chapter, will search up to page {search_limit}")
+            log.debug("Could not find next chapter, will search up to page %s", search_limit)
         
-        print(f"Searching for verses {verse_start}-{verse_end} between pages {chapter_start_page} and {search_limit-1}")
+        log.debug("Searching for verses %s-%s between pages %s and %s", verse_start, verse_end, chapter_start_page, search_limit-1)
         
         # Flag to indicate whether we need to look for a surah description
         # This happens when verse 1 is included in the range
         include_surah_description = (verse_start == 1)
         if include_surah_description:
-            print("Verse 1 requested - will look for surah description")
+            log.debug("Verse 1 requested - will look for surah description")
         
         # Dictionary to store verse numbers and their positions on each page
         page_verses = {}
@@ -373,10 +856,18 @@ def extract_verses_with_counter(pdf_path, chapter, verse_start, verse_end=None,
         
         # First pass: identify all verses and their positions with high confidence
         for page_num in range(chapter_start_page, search_limit):
-            page = doc[page_num]
+            # Plain text first, the detailed structure is only parsed for pages that need it
+            text, _, page_height = _page_text(pdf_path, page_num)
+            # Header/footer bands, blocks reaching into them are skipped
+            top_cutoff = page_height * 0.1
+            bottom_cutoff = page_height * 0.9
             
-            # Get text with detailed structure
-            blocks = page.get_text("dict")["blocks"]
+            # Most pages hold none of the target verses, one regex pass over the whole
+            # page text is enough to rule them out before the line-by-line scan
+            has_candidates = any(
+                verse_start <= int(match.group(1)) <= verse_end
+                for match in _VERSE_NUM_ALT_RE.finditer(text)
+            )
             
             # Track verses found on this page
             verses_on_page = {}  # {verse_num: [(y_position, confidence, bbox)]}
@@ -388,16 +879,15 @@ def extract_verses_with_counter(pdf_path, chapter, verse_start, verse_end=None,
                 description_y_min = float('inf')
                 description_y_max = 0
                 
-                for block in blocks:
+                for block in _page_blocks(pdf_path, page_num):
                     if "lines" not in block:
                         continue
                     
                     # Skip very top/bottom portions
                     block_y_min = block["bbox"][1]
                     block_y_max = block["bbox"][3]
-                    page_height = page.rect.height
                     
-                    if block_y_min < page_height * 0.05 or block_y_max > page_height * 0.9:
+                    if block_y_min < page_height * 0.05 or block_y_max > bottom_cutoff:
                         continue
                     
                     # Check if any spans in this block have red text (likely description)
@@ -429,220 +919,157 @@ def extract_verses_with_counter(pdf_path, chapter, verse_start, verse_end=None,
                         description_blocks.append(block)
                         description_y_min = min(description_y_min, block_y_min)
                         description_y_max = max(description_y_max, block_y_max)
-                        print(f"Found potential surah description: {block_text.strip()}")
+                        log.debug("Found potential surah description: %s", block_text.strip())
                 
                 if description_blocks:
                     # We found some text that might be the surah description
                     surah_description = description_blocks
                     surah_description_position = (description_y_min, description_y_max)
-                    print(f"Identified surah description at y-position: {description_y_min} to {description_y_max}")
+                    log.debug("Identified surah description at y-position: %s to %s", description_y_min, description_y_max)
             
-            # Process each text block for verses
-            for block in blocks:
-                if "lines" not in block:
-                    continue
-                
-                # Skip headers/footers (typically at very top or bottom)
-                block_y_min = block["bbox"][1]
-                block_y_max = block["bbox"][3]
-                page_height = page.rect.height
-                
-                if block_y_min < page_height * 0.1 or block_y_max > page_height * 0.9:
-                    continue
-                
-                # Process each line
-                for line in block["lines"]:
-                    line_text = "".join([span["text"] for span in line["spans"]])
+            # Process each text block for verses, unless a single pass over the page
+            # text shows none of the target verse numbers appear on it at all
+            if has_candidates:
+                # Verses run in order down the page, so once every target verse is found and
+                # a verse following them (which the crop ends at) is seen too, the rest of the
+                # page is skipped. Stray larger numbers in intro text or at a chapter change
+                # mean only a verse just after verse_end counts, not any larger number.
+                following_verse_seen = False
+                for block in _page_blocks(pdf_path, page_num):
+                    if following_verse_seen and found_verses == target_verses:
+                        break
                     
-                    # Multiple regex patterns to catch verse numbers in different formats
-                    # Pattern 1: Standard format - number followed by period and space
-                    verse_matches = list(re.finditer(r'(\d+)\.\s', line_text))
-                    # Pattern 2: Look for verse numbers anywhere in the line
-                    if not verse_matches and line_text.strip():
-                        # Look for numbers followed by a period that are likely verse numbers
-                        verse_matches = list(re.finditer(r'(\d+)\.\s', line_text))
-                        
-                        # Additional pattern to catch verse numbers with different formatting
-                        if not verse_matches:
-                            verse_matches = list(re.finditer(r'(?<!\d)(\d+)\.(?!\d)', line_text))
+                    if "lines" not in block:
+                        continue
                     
-                    # Only show matches that are within our target range
-                    target_matches = []
-                    for match in verse_matches:
-                        try:
-                            verse_num = int(match.group(1))
-                            if verse_start <= verse_num <= verse_end:
-                                target_matches.append(verse_num)
-                        except ValueError:
-                            continue
+                    # Skip headers/footers (typically at very top or bottom)
+                    block_y_min = block["bbox"][1]
+                    block_y_max = block["bbox"][3]
                     
-                    if target_matches:
-                        print(f"Page {page_num}: Found target verses: {target_matches}")
+                    if block_y_min < top_cutoff or block_y_max > bottom_cutoff:
+                        continue
                     
-                    for match in verse_matches:
-                        try:
-                            verse_num = int(match.group(1))
-                            
-                            # Skip unreasonable verse numbers
-                            if verse_num < 1 or verse_num > 300:
-                                continue
-                                
-                            # Look at the context after the verse number
-                            match_end = match.end()
-                            after_text = line_text[match_end:match_end+30] if match_end < len(line_text) else ""
-                            
-                            # Real verses usually have text following the number
-                            if not after_text.strip():
-                                continue
-                            
-                            # Calculate confidence based on multiple factors
-                            confidence = 0
-                            
-                            # Look at the spans to check formatting
-                            match_pos = match.start()
-                            span_containing_verse = None
-                            
-                            # Find which span contains this verse number
-                            pos = 0
-                            for span in line["spans"]:
-                                span_text = span["text"]
-                                span_len = len(span_text)
-                                
-                                if pos <= match_pos < pos + span_len:
-                                    span_containing_verse = span
-                                    break
-                                pos += span_len
+                    # Process each line
+                    for line in block["lines"]:
+                        verse_numbers, scored_verses = _scan_line_verses(line)
+                        
+                        # Only show matches that are within our target range
+                        target_matches = [verse_num for verse_num in verse_numbers if verse_start <= verse_num <= verse_end]
+                        if target_matches:
+                            log.debug("Page %s: Found target verses: %s", page_num, target_matches)
+                        
+                        # Record the y-position and bounding box for cropping
+                        y_pos = line["bbox"][1]
+                        bbox = line["bbox"]  # [x0, y0, x1, y1]
+                        
+                        for verse_num, confidence in scored_verses:
+                            if verse_end < verse_num <= verse_end + 5:
+                                following_verse_seen = True
+                            if verse_num not in verses_on_page:
+                                verses_on_page[verse_num] = []
+                            verses_on_page[verse_num].append((y_pos, confidence, bbox))
                             
-                            if span_containing_verse:
-                                # Bold numbers are more likely to be verse numbers
-                                if span_containing_verse["flags"] & 16:  # Bold
-                                    confidence += 3
-                                
-                                # Larger font size indicates verse numbers
-                                font_size = span_containing_verse["size"]
-                                if font_size > 10:
-                                    confidence += 1
-                                
-                                # Check for distinctive verse format - number at beginning of line
-                                if match_pos < 5:
-                                    confidence += 2
-                                
-                                # Check length - verse numbers are usually 1-3 digits
-                                verse_str = match.group(1)
-                                if 1 <= len(verse_str) <= 3:
-                                    confidence += 1
-                                
-                                # Record the y-position and bounding box for cropping
-                                y_pos = line["bbox"][1]
-                                bbox = line["bbox"]  # [x0, y0, x1, y1]
-                                
-                                # Only add verses with reasonable confidence
-                                if confidence >= 2:
-                                    if verse_num not in verses_on_page:
-                                        verses_on_page[verse_num] = []
-                                    verses_on_page[verse_num].append((y_pos, confidence, bbox))
-                                    
-                                    # Log target verses with highest confidence
-                                    if verse_start <= verse_num <= verse_end:
-                                        found_verses.add(verse_num)
-                                        print(f"Page {page_num}: Found verse {verse_num} at y={y_pos} with confidence {confidence}")
-                        except ValueError:
-                            continue
+                            # Log target verses with highest confidence
+                            if verse_start <= verse_num <= verse_end:
+                                found_verses.add(verse_num)
+                                log.debug("Page %s: Found verse %s at y=%s with confidence %s", page_num, verse_num, y_pos, confidence)
             
             # Store all verses found on this page
             if verses_on_page:
                 page_verses[page_num] = verses_on_page
                 
                 # Check if the page has any target verses
-                has_target_verses = False
-                for v in range(verse_start, verse_end + 1):
-                    if v in verses_on_page:
-                        has_target_verses = True
-                        break
+                page_target_verses = target_verses.intersection(verses_on_page)
                 
-                if has_target_verses:
-                    print(f"Page {page_num} contains target verses: {[v for v in verses_on_page.keys() if verse_start <= v <= verse_end]}")
+                if page_target_verses:
+                    log.debug("Page %s contains target verses: %s", page_num, [v for v in verses_on_page.keys() if v in page_target_verses])
                     relevant_pages.append(page_num)
+                
+                # The whole range is on this one page, so it's the only page to render
+                # and there's nothing left to look for on the following ones
+                if page_target_verses == target_verses:
+                    log.debug("All target verses %s-%s are on page %s, stopping search", verse_start, verse_end, page_num)
+                    relevant_pages = [page_num]
+                    break
             
             # If we've found all verses, check one more page then stop
             if found_verses == target_verses and page_num > min(relevant_pages):
-                print(f"Found all target verses {verse_start}-{verse_end}, stopping search")
+                log.debug("Found all target verses %s-%s, stopping search", verse_start, verse_end)
                 break
         
         # Sort pages and ensure there are no duplicates
         relevant_pages = sorted(set(relevant_pages))
         
+        # y-position of each verse found on the relevant pages: its highest confidence match and its topmost match
+        best_pos = {p: {v: max(positions, key=lambda x: x[1])[0] for v, positions in page_verses[p].items()}
+                    for p in relevant_pages if p in page_verses}
+        first_pos = {p: {v: min(positions, key=lambda x: x[0])[0] for v, positions in page_verses[p].items()}
+                     for p in relevant_pages if p in page_verses}
+        # Verse numbers found on each relevant page in order, to find the verse after a range by bisection
+        sorted_verses = {p: sorted(first_pos[p]) for p in first_pos}
+        
         # If we couldn't find any relevant pages, use the chapter start
         if not relevant_pages:
-            print(f"Warning: Could not find verses {verse_start}-{verse_end}, using chapter start page")
+            log.warning("Could not find verses %s-%s, using chapter start page", verse_start, verse_end)
             relevant_pages.append(chapter_start_page)
         
         # Report on which verses were found and which weren't
         if found_verses != target_verses:
             missing_verses = target_verses - found_verses
-            print(f"Warning: Could not find all target verses. Missing: {sorted(list(missing_verses))}")
+            log.warning("Could not find all target verses. Missing: %s", sorted(list(missing_verses)))
         
         # Process each relevant page
         output_paths = []  # Track the image files we generate
         cropped_images = []  # Store cropped images for merging
         
-        for page_num in relevant_pages:
-            page = doc[page_num]
-            
-            # Create a high-quality image of the page
-            zoom = 3.0
-            mat = fitz.Matrix(zoom, zoom)
-            pix = page.get_pixmap(matrix=mat)
-            
-            # Base filename
-            filename = f"quran_surah{chapter}_verse{verse_start}"
-            if verse_end != verse_start:
-                filename += f"-{verse_end}"
-            
-            # Add page number to make the filename unique, especially for multi-page extracts
-            filename += f"_page{page_num}"
-            
-            # Create a non-cropped version first as backup
-            backup_filename = filename + ".png"
-            backup_path = os.path.join(output_dir, backup_filename)
-            pix.save(backup_path)
-            output_paths.append(backup_path)
-            print(f"Saved full page as backup: {backup_path}")
+        # Base filename, the page number is added to make it unique for multi-page extracts
+        base_filename = f"quran_surah{chapter}_verse{verse_start}"
+        if verse_end != verse_start:
+            base_filename += f"-{verse_end}"
+        
+        # Render the relevant pages, in parallel when there's more than one. Renders are
+        # produced as the loop below consumes them, each full page is freed once it moves on
+        render_workers = min(len(relevant_pages), max_render_workers or os.cpu_count() or 1)
+        renders = _render_pages(pdf_path, relevant_pages, zoom, render_workers)
+        
+        need_merge = len(relevant_pages) > 1
+        # Per-page crops that go into the merged image are only written if asked for
+        defer_crops = need_merge and not keep_intermediate
+        for page_num, (samples, pix_width, pix_height) in zip(relevant_pages, renders):
+            filename = f"{base_filename}_page{page_num}"
+            # Read the raw pixels in place, cropping is just a row slice of this array
+            page_pixels = np.frombuffer(samples, dtype=np.uint8).reshape(pix_height, pix_width, -1)[:, :, :3]
+            # The full page is only written out when no cropped image gets saved
+            saved_crop = False
             
             # Determine crop points
             should_crop = False
             crop_y_start = 0
-            crop_y_end = pix.height
+            crop_y_end = pix_height
             
             if page_num in page_verses:
                 # Find the target verses on this page
-                page_target_verses = [v for v in range(verse_start, verse_end + 1) if v in page_verses[page_num]]
+                page_target_verses = target_verses.intersection(page_verses[page_num])
                 
                 if page_target_verses:
                     # Find the earliest target verse on this page
                     first_verse_num = min(page_target_verses)
-                    positions = page_verses[page_num][first_verse_num]
-                    positions.sort(key=lambda x: x[1], reverse=True)  # Sort by confidence
-                    first_verse_pos = positions[0][0]  # Get y-position of highest confidence match
+                    first_verse_pos = best_pos[page_num][first_verse_num]
                     
                     # Find the latest target verse on this page
                     last_verse_num = max(page_target_verses)
-                    positions = page_verses[page_num][last_verse_num]
-                    positions.sort(key=lambda x: x[1], reverse=True)
-                    last_verse_pos = positions[0][0]
+                    last_verse_pos = best_pos[page_num][last_verse_num]
                     
                     # Find the next verse after our target range on this page
                     next_verse_pos = None
                     next_verse_num = None
                     
-                    # Look for verses that come after our last target verse on this page
-                    for v in sorted(page_verses[page_num].keys()):
-                        if v > last_verse_num:
-                            positions = page_verses[page_num][v]
-                            positions.sort(key=lambda x: x[0])  # Sort by y-position
-                            next_verse_pos = positions[0][0]
-                            next_verse_num = v
-                            break
+                    # Look for the first verse that comes after our last target verse on this page
+                    page_verse_nums = sorted_verses[page_num]
+                    next_index = bisect_right(page_verse_nums, last_verse_num)
+                    if next_index < len(page_verse_nums):
+                        next_verse_num = page_verse_nums[next_index]
+                        next_verse_pos = first_pos[page_num][next_verse_num]
                     
                     # Determine crop boundaries
                     if first_verse_pos is not None:
@@ -651,64 +1078,72 @@ def extract_verses_with_counter(pdf_path, chapter, verse_start, verse_end=None,
                             # Start at the surah description
                             padding_above_description = 60
                             crop_y_start = max(0, (surah_description_position[0] * zoom) - (padding_above_description * zoom))
-                            print(f"Including surah description in crop, starting at y={crop_y_start}")
+                            log.debug("Including surah description in crop, starting at y=%s", crop_y_start)
                         else:
                             # Start crop above the first verse - add adequate padding
                             padding_start = 60  # pixels in original scale
                             crop_y_start = max(0, (first_verse_pos * zoom) - (padding_start * zoom))
                         
                         should_crop = True
-                        print(f"Starting crop at y={crop_y_start} (above verse {first_verse_num})")
+                        log.debug("Starting crop at y=%s (above verse %s)", crop_y_start, first_verse_num)
                     
                     if next_verse_pos is not None:
                         # End crop just before the next verse
                         padding_end = 20  # pixels in original scale
-                        crop_y_end = min(pix.height, (next_verse_pos * zoom) - (padding_end * zoom))
+                        crop_y_end = min(pix_height, (next_verse_pos * zoom) - (padding_end * zoom))
                         should_crop = True
-                        print(f"Ending crop at y={crop_y_end} (before verse {next_verse_num})")
+                        log.debug("Ending crop at y=%s (before verse %s)", crop_y_end, next_verse_num)
                     elif last_verse_pos is not None:
                         # If no next verse, extend crop below the last verse
                         padding_after = 120  # pixels in original scale
-                        crop_y_end = min(pix.height, (last_verse_pos * zoom) + (padding_after * zoom))
+                        crop_y_end = min(pix_height, (last_verse_pos * zoom) + (padding_after * zoom))
                         should_crop = True
-                        print(f"Ending crop at y={crop_y_end} (after verse {last_verse_num})")
+                        log.debug("Ending crop at y=%s (after verse %s)", crop_y_end, last_verse_num)
             
             # Apply cropping if needed
             if should_crop:
                 try:
-                    # Convert pixmap to PIL Image for cropping
-                    img_data = pix.tobytes("png")
-                    img = Image.open(io.BytesIO(img_data))
-                    
                     # Ensure crop dimensions are integers
                     crop_y_start = int(crop_y_start)
                     crop_y_end = int(crop_y_end)
                     
                     # Only crop if we have meaningful boundaries
-                    if crop_y_start < crop_y_end and (crop_y_start > 0 or crop_y_end < pix.height):
-                        print(f"Cropping page {page_num} from y={crop_y_start} to y={crop_y_end}")
-                        
-                        # Crop the image
-                        cropped_img = img.crop((0, crop_y_start, pix.width, crop_y_end))
+                    if crop_y_start < crop_y_end and (crop_y_start > 0 or crop_y_end < pix_height):
+                        log.debug("Cropping page %s from y=%s to y=%s", page_num, crop_y_start, crop_y_end)
                         
-                        # Store the cropped image for merging
-                        cropped_images.append((page_num, cropped_img))
+                        # Crop the image, a view into the rendered samples rather than a copy
+                        cropped = page_pixels[crop_y_start:crop_y_end]
                         
-                        # Save individual cropped image
                         cropped_filename = filename + "_cropped.png"
                         output_path = os.path.join(output_dir, cropped_filename)
-                        cropped_img.save(output_path)
-                        output_paths.append(output_path)
-                        print(f"Saved cropped image to: {output_path}")
+                        
+                        # Keep the cropped image for merging, only needed with more than one page.
+                        # Copied out so the view doesn't keep the whole page alive until then
+                        if need_merge:
+                            cropped_images.append((page_num, cropped.copy(), output_path))
+                        
+                        # Save individual cropped image
+                        if not defer_crops:
+                            _save_png(cropped, output_path)
+                            output_paths.append(output_path)
+                            log.info("Saved cropped image to: %s", output_path)
+                        saved_crop = True
                     else:
-                        print(f"Skipping crop: invalid dimensions ({crop_y_start} to {crop_y_end})")
+                        log.warning("Skipping crop: invalid dimensions (%s to %s)", crop_y_start, crop_y_end)
                 except Exception as e:
-                    print(f"Error during cropping: {e}")
+                    log.error("Error during cropping: %s", e)
+            
+            if not saved_crop:
+                # Fall back to the full page
+                backup_path = os.path.join(output_dir, filename + ".png")
+                _save_png(page_pixels, backup_path)
+                output_paths.append(backup_path)
+                log.info("Saved full page: %s", backup_path)
         
         # Merge cropped images if we have multiple pages
         if len(cropped_images) > 1:
             try:
-                print(f"Merging {len(cropped_images)} cropped images into a single image...")
+                log.info("Merging %s cropped images into a single image...", len(cropped_images))
                 
                 # Sort images by page number
                 cropped_images.sort(key=lambda x: x[0])
@@ -716,37 +1151,22 @@ def extract_verses_with_counter(pdf_path, chapter, verse_start, verse_end=None,
                 # Simple version: vertical stack with fixed gap
                 gap = 60  # Gap between images in pixels
                 
-                # Calculate total height and maximum width
-                total_height = sum(img.height for _, img in cropped_images) + gap * (len(cropped_images) - 1)
-                max_width = max(img.width for _, img in cropped_images)
+                max_width = max(img.shape[1] for _, img, _ in cropped_images)
                 
-                # Create a new image with the calculated dimensions
-                merged_img = Image.new('RGB', (max_width, total_height), (255, 255, 255))
+                # White gap with a thin gray separator line in the middle
+                separator = np.full((gap, max_width, 3), 255, dtype=np.uint8)
+                separator[gap // 2] = (200, 200, 200)
                 
-                # Paste each image with a gap
-                y_position = 0
-                for i, (page_num, img) in enumerate(cropped_images):
-                    # Center the image horizontally
-                    x_position = (max_width - img.width) // 2
-                    
-                    # Paste the image
-                    merged_img.paste(img, (x_position, y_position))
-                    
-                    # Move to the next position
-                    y_position += img.height
-                    
-                    # Add a gap after each image except the last one
-                    if i < len(cropped_images) - 1:
-                        # Draw a simple separator line
-                        for y in range(gap):
-                            for x in range(max_width):
-                                # Create a subtle gradient for the gap
-                                if y == gap // 2:
-                                    # Draw a thin gray line in the middle
-                                    merged_img.putpixel((x, y_position + y), (200, 200, 200))
-                        
-                        # Move past the gap
-                        y_position += gap
+                # Center each image horizontally by padding it to the widest one, then
+                # stack them with a separator between each pair in one concatenation
+                parts = []
+                for i, (page_num, img, _) in enumerate(cropped_images):
+                    if i > 0:
+                        parts.append(separator)
+                    left = (max_width - img.shape[1]) // 2
+                    right = max_width - img.shape[1] - left
+                    parts.append(np.pad(img, ((0, 0), (left, right), (0, 0)), constant_values=255))
+                merged = np.concatenate(parts, axis=0)
                 
                 # Save the merged image
                 merged_filename = f"quran_surah{chapter}_verse{verse_start}"
@@ -754,26 +1174,122 @@ def extract_verses_with_counter(pdf_path, chapter, verse_start, verse_end=None,
                     merged_filename += f"-{verse_end}"
                 merged_filename += "_merged.png"
                 merged_path = os.path.join(output_dir, merged_filename)
-                merged_img.save(merged_path)
+                _save_png(merged, merged_path)
                 output_paths.append(merged_path)
-                print(f"Saved merged image to: {merged_path}")
+                log.info("Saved merged image to: %s", merged_path)
+                # Only drop the crops once the merged image is on disk, the fallback below needs them
+                cropped_images.clear()
             except Exception as e:
-                print(f"Error merging images: {e}")
-                import traceback
-                traceback.print_exc()
+                log.exception("Error merging images: %s", e)
         
-        print(f"Extraction for Surah {chapter}, verses {verse_start}-{verse_end} completed")
-        print(f"Created {len(output_paths)} output files")
-        doc.close()
+        if defer_crops:
+            # Nothing got merged (a single crop, or the merge failed), save the held back crops
+            for page_num, img, output_path in cropped_images:
+                _save_png(img, output_path)
+                output_paths.append(output_path)
+                log.info("Saved cropped image to: %s", output_path)
+            cropped_images.clear()
+        
+        log.info("Extraction for Surah %s, verses %s-%s completed", chapter, verse_start, verse_end)
+        log.info("Created %s output files", len(output_paths))
         return len(output_paths) > 0
         
     except Exception as e:
-        print(f"Error extracting verses: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error extracting verses: %s", e)
         return False
 
+def _configure_logging(level):
+    """Send log records to stdout, next to the __main__ report."""
+    logging.basicConfig(stream=sys.stdout, level=level, format="%(message)s")
+
+def _init_worker(log_level=None):
+    """
+    Set up a worker process.
+    
+    Args:
+        log_level: Configure logging at this level, spawned workers don't inherit the
+            parent's handlers (optional)
+    """
+    # Drop the PDF handle inherited from the parent process, each worker opens its own
+    _open_doc.cache_clear()
+    if log_level is not None:
+        _configure_logging(log_level)
+
+def process_api_page(api_page, verse_range, pdf_path, surah_pages, known_surah_pages, output_dir):
+    """
+    Extract the verses of one API page, run in a worker process.
+    
+    Args:
+        api_page: API page number
+        verse_range: Verse range of the page as returned by get_page_verse_ranges
+        pdf_path: Path to the PDF file
+        surah_pages: Detected chapter start pages, must already hold every chapter the page
+            needs that known_surah_pages doesn't
+        known_surah_pages: Manually verified chapter start pages
+        output_dir: Directory to save output images
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    start_chapter = verse_range['start_chapter']
+    start_verse = verse_range['start_verse']
+    end_chapter = verse_range['end_chapter']
+    end_verse = verse_range['end_verse']
+    
+    def chapter_page(chapter):
+        return surah_pages.get(chapter, known_surah_pages.get(chapter))
+    
+    log.info("============ Processing API page %s ============", api_page)
+    log.info("Extracting Surah %s:%s to %s:%s", start_chapter, start_verse, end_chapter, end_verse)
+    
+    # Pages are already rendered in parallel across API pages, one process each is enough
+    if start_chapter == end_chapter:
+        log.info("Single chapter extraction: Surah %s, verses %s-%s", start_chapter, start_verse, end_verse)
+        return extract_verses_with_counter(
+            pdf_path,
+            start_chapter,
+            start_verse,
+            end_verse,
+            output_dir,
+            chapter_start_page=chapter_page(start_chapter),
+            next_chapter_start_page=chapter_page(start_chapter + 1),
+            max_render_workers=1
+        )
+    
+    # Handle cross-chapter ranges separately
+    log.info("Cross-chapter range detected: Surah %s to %s", start_chapter, end_chapter)
+    
+    # First extract starting chapter
+    log.info("--- Extracting first part: Surah %s from verse %s to end ---", start_chapter, start_verse)
+    success1 = extract_verses_with_counter(
+        pdf_path,
+        start_chapter,
+        start_verse,
+        None,  # Extract all verses from starting verse to end of chapter
+        output_dir,
+        chapter_start_page=chapter_page(start_chapter),
+        next_chapter_start_page=chapter_page(start_chapter + 1),
+        max_render_workers=1
+    )
+    
+    # Then extract ending chapter
+    log.info("--- Extracting second part: Surah %s from start to verse %s ---", end_chapter, end_verse)
+    success2 = extract_verses_with_counter(
+        pdf_path,
+        end_chapter,
+        1,  # Start from beginning of chapter
+        end_verse,
+        output_dir,
+        chapter_start_page=chapter_page(end_chapter),
+        next_chapter_start_page=chapter_page(end_chapter + 1),
+        max_render_workers=1
+    )
+    
+    return success1 and success2
+
 if __name__ == "__main__":
+    # Progress goes to stdout next to the report below, per-line detail is at DEBUG
+    _configure_logging(logging.INFO)
     print("\n============ QURAN EXTRACTION TOOL - VERSION 4.4 ============\n")
     
     try:
@@ -796,9 +1312,7 @@ if __name__ == "__main__":
         
         # Verify it's a valid PDF
         try:
-            doc = fitz.open(pdf_path)
-            total_pages = len(doc)
-            doc.close()
+            total_pages = len(_open_doc(pdf_path))
             print(f"PDF loaded successfully: {total_pages} pages")
         except Exception as e:
             print(f"ERROR: Could not open file as PDF: {e}")
@@ -819,10 +1333,12 @@ if __name__ == "__main__":
             # Clean up previous output files to avoid confusion
             print(f"Cleaning up existing output directory: {output_dir}")
             try:
-                for file in os.listdir(output_dir):
-                    if file.startswith("quran_") and file.endswith(".png"):
-                        os.remove(os.path.join(output_dir, file))
-                        print(f"Deleted: {file}")
+                # scandir hands back each entry's path along with its name, one pass over the directory
+                with os.scandir(output_dir) as entries:
+                    for entry in entries:
+                        if entry.name.startswith("quran_") and entry.name.endswith(".png"):
+                            os.unlink(entry.path)
+                            print(f"Deleted: {entry.name}")
             except Exception as e:
                 print(f"Warning: Error while cleaning output directory: {e}")
         
@@ -842,64 +1358,75 @@ if __name__ == "__main__":
             9: 217   # At-Tawbah
         }
         
-        # First test surah detection to verify it's working correctly
-        print("\n============ TESTING SURAH DETECTION WITH STRICT CHECKS ============\n")
-        surah_pages = {}
-        found_pages = []  # Track pages we've already identified as containing surahs
-        
-        # Test identification of important surahs, but now skip pages we've already found
-        for chapter in [1, 2, 3, 7, 9]:
-            print(f"Looking for Surah {chapter}...")
-            
-            # Use the known page as a fallback if detection fails
-            if chapter in known_surah_pages:
-                print(f"Known page for Surah {chapter} is {known_surah_pages[chapter]}")
-            
-            # Try to detect the page, avoiding any pages we've already found
-            page = find_chapter_start_page(pdf_path, chapter, start_page=28, found_pages=found_pages)
+        # Chapter pages detected on an earlier run with the same PDF skip the detection below
+        surah_pages = load_surah_pages(pdf_path)
+        if surah_pages:
+            print(f"\nLoaded surah pages from cache: {surah_pages}")
+            found_pages = list(surah_pages.values())
+        else:
+            # First test surah detection to verify it's working correctly
+            print("\n============ TESTING SURAH DETECTION WITH STRICT CHECKS ============\n")
+            surah_pages = {}
+            found_pages = []  # Track pages we've already identified as containing surahs
             
-            # Verify the detected page isn't already assigned to another surah
-            if page in found_pages:
-                print(f"Warning: Page {page} was already assigned to another surah!")
+            # Test identification of important surahs, but now skip pages we've already found
+            for chapter in [1, 2, 3, 7, 9]:
+                print(f"Looking for Surah {chapter}...")
                 
-                # Use the known page number as fallback
-                if chapter in known_surah_pages:
-                    page = known_surah_pages[chapter]
-                    print(f"Using known page {page} for Surah {chapter} instead")
-                else:
-                    # If we don't have a known page, try the next page (basic fallback)
-                    next_page = page + 1
-                    print(f"Trying next page: {next_page}")
-                    page = next_page
-            
-            if page:
-                print(f"Successfully found Surah {chapter} on page {page}")
-                surah_pages[chapter] = page
-                found_pages.append(page)  # Add to the list of found pages to avoid this page for future surahs
-            else:
-                # If detection failed, use the known page if available
+                # Use the known page as a fallback if detection fails
                 if chapter in known_surah_pages:
-                    page = known_surah_pages[chapter]
-                    print(f"Detection failed, using known page {page} for Surah {chapter}")
+                    print(f"Known page for Surah {chapter} is {known_surah_pages[chapter]}")
+                
+                # Try to detect the page, avoiding any pages we've already found
+                page = find_chapter_start_page(pdf_path, chapter, start_page=28, found_pages=found_pages)
+                
+                # Verify the detected page isn't already assigned to another surah
+                if page in found_pages:
+                    print(f"Warning: Page {page} was already assigned to another surah!")
+                    
+                    # Use the known page number as fallback
+                    if chapter in known_surah_pages:
+                        page = known_surah_pages[chapter]
+                        print(f"Using known page {page} for Surah {chapter} instead")
+                    else:
+                        # If we don't have a known page, try the next page (basic fallback)
+                        next_page = page + 1
+                        print(f"Trying next page: {next_page}")
+                        page = next_page
+                
+                if page:
+                    print(f"Successfully found Surah {chapter} on page {page}")
                     surah_pages[chapter] = page
-                    found_pages.append(page)
+                    found_pages.append(page)  # Add to the list of found pages to avoid this page for future surahs
                 else:
-                    print(f"Failed to find Surah {chapter} and no known page available")
-        
-        # Verify that different surahs are on different pages
-        if len(set(surah_pages.values())) < len(surah_pages):
-            print("\nWARNING: Some surahs were detected on the same page. Using known page numbers instead.")
+                    # If detection failed, use the known page if available
+                    if chapter in known_surah_pages:
+                        page = known_surah_pages[chapter]
+                        print(f"Detection failed, using known page {page} for Surah {chapter}")
+                        surah_pages[chapter] = page
+                        found_pages.append(page)
+                    else:
+                        print(f"Failed to find Surah {chapter} and no known page available")
             
-            # Override with known good values
-            for chapter, known_page in known_surah_pages.items():
-                if chapter in surah_pages:
-                    surah_pages[chapter] = known_page
-                    print(f"Using known page {known_page} for Surah {chapter}")
-        else:
-            print("\nSurah detection looks good - all surahs found on different pages.")
+            # Verify that different surahs are on different pages
+            if len(set(surah_pages.values())) < len(surah_pages):
+                print("\nWARNING: Some surahs were detected on the same page. Using known page numbers instead.")
+                
+                # Override with known good values
+                for chapter, known_page in known_surah_pages.items():
+                    if chapter in surah_pages:
+                        surah_pages[chapter] = known_page
+                        print(f"Using known page {known_page} for Surah {chapter}")
+            else:
+                print("\nSurah detection looks good - all surahs found on different pages.")
         
         print(f"\nSurah pages to be used: {surah_pages}")
         
+        # surah_pages is the chapter -> PDF page index for the rest of the run: chapters
+        # found below are added to it, and the next chapter's page is passed into each
+        # extraction so it doesn't search the PDF for it again. The API can't supply
+        # these directly, its page numbers are Mushaf pages rather than PDF pages.
+        
         # API configuration - using the alquran.cloud API
         api_url = "http://api.alquran.cloud/v1"
         
@@ -925,114 +1452,52 @@ if __name__ == "__main__":
         success_count = 0
         failure_count = 0
         
-        # Process each API page
+        # Find every chapter start page the API pages need first, searching the PDF where
+        # neither index has it, so the extraction workers below never have to search
+        jobs = {}
         for api_page, verse_range in page_verse_ranges.items():
             start_chapter = verse_range['start_chapter']
-            start_verse = verse_range['start_verse']
             end_chapter = verse_range['end_chapter']
-            end_verse = verse_range['end_verse']
             
-            print(f"\n============ Processing API page {api_page} ============")
-            print(f"Extracting Surah {start_chapter}:{start_verse} to {end_chapter}:{end_verse}")
-            
-            # Handle verses within the same chapter
-            if start_chapter == end_chapter:
-                print(f"Single chapter extraction: Surah {start_chapter}, verses {start_verse}-{end_verse}")
-                
-                # Use the known surah page if available
-                chapter_page = None
-                if start_chapter in surah_pages:
-                    chapter_page = surah_pages[start_chapter]
-                    print(f"Using page {chapter_page} for Surah {start_chapter}")
-                elif start_chapter in known_surah_pages:
-                    chapter_page = known_surah_pages[start_chapter]
-                    print(f"Using known page {chapter_page} for Surah {start_chapter}")
-                
-                if not chapter_page:
-                    print(f"No page found for Surah {start_chapter}, trying to search for it...")
-                    chapter_page = find_chapter_start_page(pdf_path, start_chapter, found_pages=found_pages)
-                    if chapter_page:
-                        print(f"Found Surah {start_chapter} on page {chapter_page}")
-                    
-                if not chapter_page:
-                    print(f"Failed to find Surah {start_chapter}, skipping extraction")
-                    failure_count += 1
-                    continue
-                    
-                success = extract_verses_with_counter(
-                    pdf_path,
-                    start_chapter,
-                    start_verse,
-                    end_verse,
-                    output_dir,
-                    chapter_start_page=chapter_page
-                )
-                
-                if success:
-                    success_count += 1
-                else:
-                    failure_count += 1
-            else:
-                # Handle cross-chapter ranges separately
-                print(f"Cross-chapter range detected: Surah {start_chapter} to {end_chapter}")
-                
-                # Get start chapter page
-                start_chapter_page = None
-                if start_chapter in surah_pages:
-                    start_chapter_page = surah_pages[start_chapter]
-                elif start_chapter in known_surah_pages:
-                    start_chapter_page = known_surah_pages[start_chapter]
-                else:
-                    print(f"No page found for Surah {start_chapter}, trying to detect it...")
-                    start_chapter_page = find_chapter_start_page(pdf_path, start_chapter, found_pages=found_pages)
-                    
-                # Get end chapter page
-                end_chapter_page = None
-                if end_chapter in surah_pages:
-                    end_chapter_page = surah_pages[end_chapter]
-                elif end_chapter in known_surah_pages:
-                    end_chapter_page = known_surah_pages[end_chapter]
-                else:
-                    print(f"No page found for Surah {end_chapter}, trying to detect it...")
-                    end_chapter_page = find_chapter_start_page(pdf_path, end_chapter, found_pages=found_pages)
-                
-                # Skip if we couldn't find either chapter
-                if not start_chapter_page:
-                    print(f"Failed to find Surah {start_chapter}, skipping first part of extraction")
-                    failure_count += 1
-                    continue
-                    
-                if not end_chapter_page:
-                    print(f"Failed to find Surah {end_chapter}, skipping second part of extraction")
-                    failure_count += 1
-                    continue
-                
-                # First extract starting chapter
-                print(f"\n--- Extracting first part: Surah {start_chapter} from verse {start_verse} to end ---")
-                success1 = extract_verses_with_counter(
-                    pdf_path,
-                    start_chapter,
-                    start_verse,
-                    None,  # Extract all verses from starting verse to end of chapter
-                    output_dir,
-                    chapter_start_page=start_chapter_page
-                )
-                
-                # Then extract ending chapter
-                print(f"\n--- Extracting second part: Surah {end_chapter} from start to verse {end_verse} ---")
-                success2 = extract_verses_with_counter(
-                    pdf_path,
-                    end_chapter,
-                    1,  # Start from beginning of chapter
-                    end_verse,
-                    output_dir,
-                    chapter_start_page=end_chapter_page
-                )
-                
-                if success1 and success2:
-                    success_count += 1
+            missing_chapter = None
+            for chapter in sorted({start_chapter, end_chapter}):
+                if chapter in surah_pages:
+                    print(f"Using page {surah_pages[chapter]} for Surah {chapter}")
+                elif chapter in known_surah_pages:
+                    print(f"Using known page {known_surah_pages[chapter]} for Surah {chapter}")
                 else:
-                    failure_count += 1
+                    print(f"No page found for Surah {chapter}, trying to search for it...")
+                    chapter_page = find_chapter_start_page(pdf_path, chapter, found_pages=found_pages)
+                    if chapter_page:
+                        print(f"Found Surah {chapter} on page {chapter_page}")
+                        # Remember it so later API pages in this chapter don't search again
+                        surah_pages[chapter] = chapter_page
+                    else:
+                        missing_chapter = chapter
+                        break
+            
+            if missing_chapter is not None:
+                print(f"Failed to find Surah {missing_chapter}, skipping extraction of API page {api_page}")
+                failure_count += 1
+                continue
+            
+            jobs[api_page] = verse_range
+        
+        save_surah_pages(pdf_path, surah_pages)
+        
+        # API pages are independent, extract them in parallel
+        if jobs:
+            with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1), initializer=_init_worker,
+                                     initargs=(logging.getLogger().getEffectiveLevel(),)) as executor:
+                futures = [
+                    executor.submit(process_api_page, api_page, verse_range, pdf_path, surah_pages, known_surah_pages, output_dir)
+                    for api_page, verse_range in jobs.items()
+                ]
+                for future in as_completed(futures):
+                    if future.result():
+                        success_count += 1
+                    else:
+                        failure_count += 1
         
         # Print summary
         print("\n============ EXTRACTION COMPLETE ============")
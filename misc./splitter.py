@@ -1,10 +1,52 @@
+import os
+from io import BytesIO
+from multiprocessing import Pool
 from PyPDF2 import PdfWriter, PdfReader
 
-inputpdf = PdfReader(open("THE_CLEAR_QURAN_English_Translation_by_D.pdf", "rb"))
+# Per-process reader and output directory, set up by _init_worker
+_inputpdf = None
+_out_dir = None
 
-for i in range(len(inputpdf.pages)):
+
+def _init_worker(inputpdf_path, out_dir):
+    # PdfReader isn't safe to share, every process reads its own. The file is read into
+    # memory so its handle is closed right away instead of staying open in each worker
+    global _inputpdf, _out_dir
+    with open(inputpdf_path, "rb") as f:
+        _inputpdf = PdfReader(BytesIO(f.read()))
+    _out_dir = out_dir
+
+
+def _write_one(i):
     output = PdfWriter()
-    output.add_page(inputpdf.pages[i])
-    with open(f"pages/{i}.pdf" , "wb") as outputStream:
+    output.add_page(_inputpdf.pages[i])
+    with open(os.path.join(_out_dir, f"{i}.pdf"), "wb", buffering=1 << 20) as outputStream:
         output.write(outputStream)
-        
\ No newline at end of file
+
+
+def split_pages(inputpdf_path, page_numbers=None, out_dir="pages"):
+    """Write the given pages (all of them by default) of a PDF to their own files in out_dir."""
+    global _inputpdf
+    os.makedirs(out_dir, exist_ok=True)
+    if page_numbers is None:
+        page_numbers = range(len(PdfReader(inputpdf_path).pages))
+    page_numbers = list(page_numbers)
+    if not page_numbers:
+        return
+
+    if len(page_numbers) == 1:
+        # Not worth starting worker processes for a single page. The reader is dropped
+        # afterwards so the PDF's bytes don't stay around in this process
+        _init_worker(inputpdf_path, out_dir)
+        try:
+            _write_one(page_numbers[0])
+        finally:
+            _inputpdf = None
+        return
+
+    with Pool(min(os.cpu_count() or 1, len(page_numbers)), initializer=_init_worker, initargs=(inputpdf_path, out_dir)) as pool:
+        pool.map(_write_one, page_numbers)
+
+
+if __name__ == "__main__":
+    split_pages("THE_CLEAR_QURAN_English_Translation_by_D.pdf")
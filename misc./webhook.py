@@ -34,8 +34,6 @@ def onIncomingMessageReceived(body):
     )
 
 
-# main()
-
 class Exception1(Exception):
     pass
 
@@ -72,7 +70,10 @@ def foo2():
 
     return 0
 
-test()
+
+if __name__ == "__main__":
+    # main()
+    test()
 
 
 # 2023-09-11 22:48:02.441375
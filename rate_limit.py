@@ -0,0 +1,26 @@
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """Spaces calls out to at most `rate` per second, shared across threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def _reserve(self):
+        # Claim the next free slot and return how long to wait for it
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+            return slot - now
+
+    def wait(self):
+        time.sleep(self._reserve())
+
+    async def wait_async(self):
+        await asyncio.sleep(self._reserve())
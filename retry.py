@@ -0,0 +1,35 @@
+import functools
+import random
+import time
+
+# None is what the GreenAPI client reports when the request never got a response
+RETRIABLE_CODES = (None, 429, 500, 502, 503, 504)
+MAX_ATTEMPTS = 5
+
+
+def backoff_delay(attempt: int, base: float = 1, cap: float = 60, retry_after: str = None):
+    # Respect the server's Retry-After (in seconds) when it sends one
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), cap)
+        except ValueError:
+            pass
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def retry_on_code(attempts: int = MAX_ATTEMPTS, base: float = 1, cap: float = 60):
+    """Retry a call returning a GreenAPI response while its code is retriable."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(attempts):
+                response = func(*args, **kwargs)
+                if response.code not in RETRIABLE_CODES or attempt == attempts - 1:
+                    return response
+                time.sleep(backoff_delay(attempt, base, cap))
+
+        return wrapper
+
+    return decorator
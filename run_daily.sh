@@ -1,19 +1,9 @@
 #!/bin/bash
 
-# Path to counter file
-COUNTER_FILE="$HOME/.daily_script_counter"
+# Meant to be run once a day by cron at 08:00, see "Deploy Instructions" in README.md
 
-# Initialize counter if file doesn't exist
-if [ ! -f "$COUNTER_FILE" ]; then
-  echo 1 > "$COUNTER_FILE"
-fi
+# Run from the repo so creds.json, state.json and the downloaded media resolve
+cd "$(dirname "$0")" || exit 1
 
-# Read current number
-NUMBER=$(cat "$COUNTER_FILE")
-
-# Call your script with the number
-/Users/yourusername/scripts/my_script.sh "$NUMBER"
-
-# Increment number
-NEXT_NUMBER=$((NUMBER + 1))
-echo "$NEXT_NUMBER" > "$COUNTER_FILE"
+# The page counter lives in state.json and only advances after a successful send
+python3 send_daily_page.py
@@ -1,14 +1,88 @@
 import argparse
-from downloader import download_files, delete_files
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Optional
+from downloader import download_files, delete_files, prefetch_files
 from messager import send_daily_messages
 
+log = logging.getLogger(__name__)
+
+STATE_FILE = "state.json"
+# Counter kept by run_daily.sh before the state moved here
+LEGACY_COUNTER_FILE = os.path.expanduser("~/.daily_script_counter")
+
+
+@dataclass
+class State:
+    page: int = 1
+    last_sent_at: Optional[str] = None  # ISO timestamp of the last successful send
+
+    def sent_today(self):
+        if self.last_sent_at is None:
+            return False
+        return datetime.fromisoformat(self.last_sent_at).date() == datetime.now().date()
+
+
+def load_state():
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE) as f:
+            return State(**json.load(f))
+    if os.path.exists(LEGACY_COUNTER_FILE):
+        with open(LEGACY_COUNTER_FILE) as f:
+            return State(page=int(f.read()))
+    return State()
+
+
+def save_state(state: State):
+    # Write then rename so a crash mid-write never leaves a truncated state file
+    tmp_path = f"{STATE_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(asdict(state), f)
+    os.replace(tmp_path, STATE_FILE)
+
+
+def send_page(page: int):
+    download_files(page)
+    send_daily_messages(page)
+
+
+def finish_page(page: int):
+    delete_files(page)
+    # Fetch tomorrow's files now so the next run can send straight away
+    prefetch_files(page + 1)
+
+
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
     parser = argparse.ArgumentParser()
-    parser.add_argument("-p", "--Page", help="Page Number")
+    parser.add_argument(
+        "-p", "--Page", type=int, dest="page", help="Page Number, defaults to the next page in state.json"
+    )
     args = parser.parse_args()
 
-    download_files(int(args.Page))
-    send_daily_messages(int(args.Page))
-    delete_files(int(args.Page))
+    if args.page is not None:
+        send_page(args.page)
+        finish_page(args.page)
+        return
+
+    state = load_state()
+    if state.sent_today():
+        # A restart or second trigger on the same day, don't send twice
+        log.info("Already sent today, page %s goes out on the next run", state.page)
+        return
+
+    page = state.page
+    send_page(page)
+    # Record the send before cleanup so a later failure can't cause a resend
+    state.page += 1
+    state.last_sent_at = datetime.now().isoformat()
+    save_state(state)
+    finish_page(page)
+
 
-main()
+if __name__ == "__main__":
+    main()